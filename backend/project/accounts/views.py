@@ -1,10 +1,13 @@
 from allauth.account.models import EmailAddress
+from asgiref.sync import sync_to_async
 from dj_rest_auth.registration.views import RegisterView
 from django.db import transaction
-from rest_framework import generics, status
+from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from project.core.views import AsyncGenericAPIView
+
 from .models import User
 from .serializers import EmailChangeSerializer, RegisterSerializer
 
@@ -29,22 +32,23 @@ class CustomRegisterView(RegisterView):
         return context
 
 
-class ChangeEmailView(generics.GenericAPIView):
+class ChangeEmailView(AsyncGenericAPIView):
     serializer_class = EmailChangeSerializer
     permission_classes = [IsAuthenticated]
 
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        # Checks the password and queries for existing emails.
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
 
         user = request.user
         new_email = serializer.validated_data["new_email"]
 
         # Check if email already exists in current site (excluding current user)
         if (
-            User.objects.filter(email__iexact=new_email, site=user.site)
+            await User.objects.filter(email__iexact=new_email, site_id=user.site_id)
             .exclude(pk=user.pk)
-            .exists()
+            .aexists()
         ):
             return Response(
                 {"new_email": ["This email address is already in use."]},
@@ -53,23 +57,29 @@ class ChangeEmailView(generics.GenericAPIView):
 
         # Update email and username (which includes the email)
         user.email = new_email
-        user.username = f"{user.site.pk}-{new_email}"
-        user.save()
+        user.username = f"{user.site_id}-{new_email}"
+        await user.asave()
 
         # Update or create EmailAddress for allauth
-        with transaction.atomic():
-            EmailAddress.objects.filter(user=user).delete()
-            email_address = EmailAddress.objects.create(
-                user=user,
-                email=new_email,
-                primary=True,
-                verified=False,  # Require re-verification
-            )
+        email_address = await sync_to_async(self._replace_email_address)(
+            user, new_email
+        )
 
         # Send confirmation email
-        email_address.send_confirmation(request=request)
+        await sync_to_async(email_address.send_confirmation)(request=request)
 
         return Response(
             {"detail": "Email change initiated. Check your email to confirm."},
             status=status.HTTP_200_OK,
         )
+
+    @staticmethod
+    @transaction.atomic
+    def _replace_email_address(user: User, email: str) -> EmailAddress:
+        EmailAddress.objects.filter(user=user).delete()
+        return EmailAddress.objects.create(
+            user=user,
+            email=email,
+            primary=True,
+            verified=False,  # Require re-verification
+        )
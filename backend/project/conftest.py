@@ -10,6 +10,7 @@ from rest_framework.test import APIClient
 
 from project.accounts.models import User
 from project.core import fields
+from project.core.sites import set_current_site, site_routes
 
 
 def _gen_slug(max_length: int = 500) -> str:  # pragma: no cover
@@ -33,6 +34,7 @@ def for_slug(field):
 TEST_SETTINGS = {
     "CACHES": {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
     "PASSWORD_HASHERS": ["django.contrib.auth.hashers.MD5PasswordHasher"],
+    "SITE_CACHE_INVALIDATION_CHANNEL": None,
     "STORAGES": {
         "default": {
             "BACKEND": "django.core.files.storage.FileSystemStorage",
@@ -71,6 +73,16 @@ def setup_test_site(django_db_setup, django_db_blocker):
         )
 
 
+@pytest.fixture(autouse=True)
+def reset_sites():
+    """
+    Don't let cached Sites (rollbacks don't send signals) or the current site
+    leak between tests.
+    """
+    site_routes.clear()
+    set_current_site(None)
+
+
 @pytest.fixture
 def api_client() -> APIClient:
     """Return a DRF API client instance."""
@@ -9,3 +9,10 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         CharField.register_lookup(Length)
+
+        from django.contrib.sites.models import SiteManager
+
+        from project.core import signals  # noqa: F401
+        from project.core.sites import get_current
+
+        SiteManager.get_current = get_current  # type: ignore[method-assign]
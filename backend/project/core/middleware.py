@@ -2,13 +2,39 @@
 Multi-tenancy middleware using Django Sites framework.
 """
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.http import Http404
-from django.utils.deprecation import MiddlewareMixin
 
+from project.core.sites import set_current_site, site_routes
 
-class SiteMiddleware(MiddlewareMixin):
+
+class SyncAndAsyncMiddleware:
+    """
+    Base for middleware that runs natively in both WSGI and ASGI stacks.
+
+    Unlike `MiddlewareMixin`, which runs sync hooks through `sync_to_async` when
+    served over ASGI, subclasses implement `__acall__` so the async path
+    doesn't need a thread hop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        raise NotImplementedError  # pragma: no cover
+
+    async def __acall__(self, request):
+        raise NotImplementedError  # pragma: no cover
+
+
+class SiteMiddleware(SyncAndAsyncMiddleware):
     """
     Middleware to identify and attach site context.
 
@@ -25,8 +51,51 @@ class SiteMiddleware(MiddlewareMixin):
     For production:
     - Each tenant has its own domain
     - Site is determined by the actual domain
+
+    Lookups go through the per-process `site_routes` table, so resolving a
+    known tenant doesn't touch the database. It also handles ports, wildcard
+    subdomains and aliases (see project.core.sites).
+
+    On ASGI, known tenants are resolved without leaving the event loop; only
+    (re)loading the routing table and the development fallbacks run in a
+    thread.
     """
 
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        self.process_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            set_current_site(None)
+
+    async def __acall__(self, request):
+        if site_routes.is_stale:
+            await sync_to_async(site_routes.load)()
+
+        site = None
+        tenant_domain = request.headers.get("x-tenant-domain")
+        if tenant_domain:
+            site = site_routes.resolve(tenant_domain)
+        # In development an unknown tenant domain gets auto-created below.
+        if site is None and not (tenant_domain and settings.DEBUG):
+            site = site_routes.resolve(request.get_host())
+
+        if site is None:
+            # Unknown tenant: 404, or auto-create a site in development.
+            await sync_to_async(self.process_request)(request)
+            site = request.site
+        else:
+            request.site = site
+
+        set_current_site(site)
+        try:
+            return await self.get_response(request)
+        finally:
+            set_current_site(None)
+
     def process_request(self, request):
         """Extract site from domain/headers and attach to request."""
         site = None
@@ -35,14 +104,12 @@ class SiteMiddleware(MiddlewareMixin):
         tenant_domain = request.headers.get("x-tenant-domain")
 
         if tenant_domain:
-            try:
-                site = Site.objects.get(domain=tenant_domain)
-            except Site.DoesNotExist:
-                if settings.DEBUG:
-                    # Auto-create site in development
-                    site = Site.objects.create(
-                        domain=tenant_domain, name=f"{tenant_domain} (Auto-created)"
-                    )
+            site = site_routes.resolve(tenant_domain)
+            if site is None and settings.DEBUG:
+                # Auto-create site in development
+                site = Site.objects.create(
+                    domain=tenant_domain, name=f"{tenant_domain} (Auto-created)"
+                )
 
         # If no site from header, use host-based detection
         if not site:
@@ -55,42 +122,36 @@ class SiteMiddleware(MiddlewareMixin):
                 host_without_port = host
 
             try:
-                # Try to get site by exact domain match first
-                try:
-                    site = Site.objects.get(domain=host)
-                except Site.DoesNotExist:
-                    try:
-                        # Try without port for development
-                        site = Site.objects.get(domain=host_without_port)
-                    except Site.DoesNotExist:
-                        # Check if this is a development environment
-                        if settings.DEBUG:
-                            if "localhost" in host_without_port:
-                                # Extract subdomain from localhost
-                                parts = host_without_port.split(".")
-                                if len(parts) >= 2:  # e.g., "demo.localhost"
-                                    subdomain = parts[0]
-                                    # Create development site if it doesn't exist
-                                    site, created = Site.objects.get_or_create(
-                                        domain=f"{subdomain}.localhost",
-                                        defaults={"name": f"{subdomain.title()} (Dev)"},
-                                    )
-                                else:
-                                    # Default localhost without subdomain
-                                    # For development, default to demo.localhost
-                                    site = Site.objects.get_or_create(
-                                        domain="demo.localhost",
-                                        defaults={"name": "Demo Site (Development)"},
-                                    )[0]
+                site = site_routes.resolve(host)
+                if site is None:
+                    # Check if this is a development environment
+                    if settings.DEBUG:
+                        if "localhost" in host_without_port:
+                            # Extract subdomain from localhost
+                            parts = host_without_port.split(".")
+                            if len(parts) >= 2:  # e.g., "demo.localhost"
+                                subdomain = parts[0]
+                                # Create development site if it doesn't exist
+                                site, created = Site.objects.get_or_create(
+                                    domain=f"{subdomain}.localhost",
+                                    defaults={"name": f"{subdomain.title()} (Dev)"},
+                                )
                             else:
-                                # Non-localhost development access
+                                # Default localhost without subdomain
+                                # For development, default to demo.localhost
                                 site = Site.objects.get_or_create(
                                     domain="demo.localhost",
                                     defaults={"name": "Demo Site (Development)"},
                                 )[0]
                         else:
-                            # Production: strict domain matching
-                            raise Http404(f"No site configured for domain: {host}")
+                            # Non-localhost development access
+                            site = Site.objects.get_or_create(
+                                domain="demo.localhost",
+                                defaults={"name": "Demo Site (Development)"},
+                            )[0]
+                    else:
+                        # Production: strict domain matching
+                        raise Http404(f"No site configured for domain: {host}")
 
             except Exception as e:
                 # In case of any database errors
@@ -107,8 +168,8 @@ class SiteMiddleware(MiddlewareMixin):
         # Attach site to request
         request.site = site
 
-        # Set current site for Django (for compatibility)
-        settings.SITE_ID = site.pk
+        # Set current site for this request only (see project.core.sites)
+        set_current_site(site)
 
         # Always return None to continue processing
         return None
@@ -0,0 +1,20 @@
+from django.contrib.sites.models import Site
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from project.core.sites import publish_invalidation, site_routes
+
+
+@receiver(post_save, sender=Site)
+def update_site_routes(sender, instance: Site, **kwargs):
+    site_routes.update(instance)
+    # Only notify other processes once the change is visible to them.
+    transaction.on_commit(lambda: publish_invalidation("save", instance.pk))
+
+
+@receiver(post_delete, sender=Site)
+def remove_site_routes(sender, instance: Site, **kwargs):
+    site_id = instance.pk
+    site_routes.remove(site_id)
+    transaction.on_commit(lambda: publish_invalidation("delete", site_id))
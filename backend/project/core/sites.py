@@ -0,0 +1,271 @@
+"""
+Per-process routing table for tenant (Site) resolution.
+
+SiteMiddleware resolves a Site for every request. Sites change rarely, so each
+process builds a host -> Site routing table from all Site rows once and
+resolves hosts from memory. When a Site is saved or deleted the local table is
+updated for just that Site and a message is published on a Redis pub/sub
+channel, so every gunicorn worker and Celery process that holds a table
+applies the same change. The whole table is also rebuilt after
+`SITE_CACHE_TTL` seconds as a safety net for missed messages.
+
+The Site resolved for the current request is kept in a context variable (see
+`get_current_site`), which is safe under threaded workers and ASGI, unlike
+assigning `settings.SITE_ID`. `Site.objects.get_current()` is patched to read it,
+so Django and allauth code that uses the Sites framework sees the tenant too.
+
+Supported host forms:
+- Exact domains, with or without a port (`example.com`, `example.com:8000`).
+- Wildcard subdomains: a Site with domain `*.example.com` matches
+  `foo.example.com` (a single label, like TLS wildcards).
+- Aliases from `settings.SITE_ALIASES`, mapping an alias host to the domain
+  of an existing Site.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+from django.conf import settings
+from django.contrib.sites.models import Site, SiteManager
+from django.db import close_old_connections
+from django.http.request import split_domain_port
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+_current_site: ContextVar[Site | None] = ContextVar("current_site", default=None)
+
+
+def get_current_site() -> Site | None:
+    """Return the Site of the request (or task) being handled, if any."""
+    return _current_site.get()
+
+
+def set_current_site(site: Site | None) -> Token:
+    return _current_site.set(site)
+
+
+@contextmanager
+def use_site(site: Site) -> Iterator[Site]:
+    """Make `site` the current site within the block, e.g. in a Celery task."""
+    token = _current_site.set(site)
+    try:
+        yield site
+    finally:
+        _current_site.reset(token)
+
+
+_default_get_current = SiteManager.get_current
+
+
+def get_current(manager: SiteManager, request=None) -> Site:
+    """
+    Replacement for `SiteManager.get_current()`.
+
+    Prefers the current site, then a site attached to `request`, and only then
+    falls back to Django's `SITE_ID` lookup (e.g. in management commands).
+    """
+    site = _current_site.get() or getattr(request, "site", None)
+    if site is not None:
+        return site
+    return _default_get_current(manager, request)
+
+
+def normalize_host(host: str) -> str:
+    return host.strip().lower().rstrip(".")
+
+
+class SiteRoutingTable:
+    """
+    Thread-safe host -> Site routing table.
+
+    Routes are stored in plain dicts that are replaced (never mutated) on
+    updates, so lookups don't need a lock. Resolved hosts, including misses,
+    are memoized so a repeated `request.get_host()` costs a single dict lookup
+    no matter how many tenants there are.
+    """
+
+    # Bound the memo of resolved hosts; wildcard Sites match unboundedly many.
+    max_resolved_hosts = 10_000
+
+    def __init__(self):
+        self._routes: dict[str, Site] = {}
+        self._wildcards: dict[str, Site] = {}
+        self._resolved: dict[str, Site | None] = {}
+        self._expires_at: float | None = None
+        self._lock = threading.Lock()
+        self._listener_pid: int | None = None
+
+    def resolve(self, host: str) -> Site | None:
+        """Return the Site serving `host`, or None if no Site matches."""
+        self._ensure_listener()
+        if self.is_stale:
+            self.load()
+
+        resolved = self._resolved
+        site = resolved.get(host, _MISSING)
+        if site is _MISSING:
+            site = self._match(host)
+            if len(resolved) >= self.max_resolved_hosts:
+                resolved.clear()
+            # Writes to a memo that has since been replaced are simply lost.
+            resolved[host] = site
+        return site  # type: ignore[return-value]
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the next lookup has to (re)load the table from the database."""
+        return self._expires_at is None or self._expires_at <= time.monotonic()
+
+    def load(self) -> None:
+        """(Re)build the table from all Sites."""
+        routes: dict[str, Site] = {}
+        wildcards: dict[str, Site] = {}
+        for site in Site.objects.all():
+            self._add_routes(site, routes, wildcards)
+        with self._lock:
+            self._routes = routes
+            self._wildcards = wildcards
+            self._resolved = {}
+            self._expires_at = time.monotonic() + settings.SITE_CACHE_TTL
+
+    def update(self, site: Site) -> None:
+        """Add `site` to the table, replacing any previous routes for it."""
+        with self._lock:
+            if self._expires_at is None:
+                return  # Not loaded yet, the first lookup will load it.
+            routes, wildcards = self._without_site(site.pk)
+            self._add_routes(site, routes, wildcards)
+            self._routes = routes
+            self._wildcards = wildcards
+            self._resolved = {}
+
+    def remove(self, site_id: int) -> None:
+        """Remove all routes pointing at the Site with primary key `site_id`."""
+        with self._lock:
+            routes, wildcards = self._without_site(site_id)
+            self._routes = routes
+            self._wildcards = wildcards
+            self._resolved = {}
+
+    def clear(self) -> None:
+        """Drop the table; the next lookup rebuilds it."""
+        with self._lock:
+            self._routes = {}
+            self._wildcards = {}
+            self._resolved = {}
+            self._expires_at = None
+
+    def _match(self, host: str) -> Site | None:
+        host = normalize_host(host)
+        site = self._routes.get(host)
+        if site is None:
+            domain, _port = split_domain_port(host)
+            site = self._routes.get(domain)
+            if site is None and "." in domain:
+                site = self._wildcards.get(domain.split(".", 1)[1])
+        return site
+
+    def _without_site(self, site_id: int) -> tuple[dict, dict]:
+        routes = {key: s for key, s in self._routes.items() if s.pk != site_id}
+        wildcards = {key: s for key, s in self._wildcards.items() if s.pk != site_id}
+        return routes, wildcards
+
+    @staticmethod
+    def _add_routes(site: Site, routes: dict, wildcards: dict) -> None:
+        domain = normalize_host(site.domain)
+        if domain.startswith("*."):
+            wildcards[domain[2:]] = site
+        else:
+            routes[domain] = site
+        for alias, target in settings.SITE_ALIASES.items():
+            if normalize_host(target) == domain:
+                routes[normalize_host(alias)] = site
+
+    def _ensure_listener(self) -> None:
+        """
+        Start the invalidation listener once per process.
+
+        This is done lazily (and keyed on the pid) rather than at import time so
+        that it also works when gunicorn preloads the app and forks workers.
+        """
+        pid = os.getpid()
+        if self._listener_pid == pid:
+            return
+        with self._lock:
+            if self._listener_pid == pid:
+                return
+            self._listener_pid = pid
+        if settings.SITE_CACHE_INVALIDATION_CHANNEL:
+            threading.Thread(
+                target=_listen_for_invalidations,
+                name="site-cache-invalidation",
+                daemon=True,
+            ).start()
+
+
+site_routes = SiteRoutingTable()
+
+
+def publish_invalidation(action: str, site_id: int) -> None:
+    """Tell all other processes that the Site `site_id` was saved or deleted."""
+    channel = settings.SITE_CACHE_INVALIDATION_CHANNEL
+    if not channel:
+        return
+
+    import redis
+
+    try:
+        redis.Redis.from_url(settings.REDIS_URL).publish(channel, f"{action}:{site_id}")
+    except redis.RedisError:
+        # Other processes will still pick up the change once their TTL expires.
+        logger.warning("Could not publish site cache invalidation", exc_info=True)
+
+
+def apply_invalidation(message: str) -> None:
+    """Apply a message sent by `publish_invalidation` to the local table."""
+    action, _, site_id = message.partition(":")
+    if action == "save":
+        site = Site.objects.filter(pk=site_id).first()
+        if site is not None:
+            site_routes.update(site)
+            return
+    # Deleted, or saved and then deleted before we got to it.
+    site_routes.remove(int(site_id))
+
+
+def _listen_for_invalidations() -> None:  # pragma: no cover
+    import redis
+
+    channel = settings.SITE_CACHE_INVALIDATION_CHANNEL
+    retry_delay = 1
+    while True:
+        try:
+            pubsub = redis.Redis.from_url(
+                settings.REDIS_URL, decode_responses=True
+            ).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(channel)
+            # Messages may have been missed while we weren't subscribed.
+            site_routes.clear()
+            retry_delay = 1
+            for message in pubsub.listen():
+                try:
+                    apply_invalidation(message["data"])
+                except Exception:
+                    logger.exception("Could not apply site cache invalidation")
+                    site_routes.clear()
+                finally:
+                    close_old_connections()
+        except redis.RedisError:
+            logger.warning(
+                "Site cache invalidation listener disconnected, retrying in %ss",
+                retry_delay,
+            )
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 60)
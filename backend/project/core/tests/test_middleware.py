@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from project.core.middleware import SiteMiddleware
+from project.core.sites import (
+    apply_invalidation,
+    get_current_site,
+    site_routes,
+    use_site,
+)
+
+
+@pytest.fixture
+def middleware() -> SiteMiddleware:
+    return SiteMiddleware(lambda request: None)
+
+
+@pytest.mark.django_db
+class TestSiteMiddleware:
+    def test_resolves_site_from_host(self, middleware, site, rf: RequestFactory):
+        request = rf.get("/", HTTP_HOST=site.domain)
+        middleware.process_request(request)
+        assert request.site == site
+
+    def test_resolves_site_from_host_without_port(
+        self, middleware, site, rf: RequestFactory
+    ):
+        request = rf.get("/", HTTP_HOST=f"{site.domain}:8000")
+        middleware.process_request(request)
+        assert request.site == site
+
+    def test_resolves_site_from_tenant_header(
+        self, middleware, site, rf: RequestFactory
+    ):
+        request = rf.get("/", HTTP_X_TENANT_DOMAIN=site.domain)
+        middleware.process_request(request)
+        assert request.site == site
+
+    def test_sets_current_site_for_the_request_only(self, site, rf: RequestFactory):
+        seen = {}
+
+        def get_response(request):
+            seen["current"] = get_current_site()
+            seen["get_current"] = Site.objects.get_current()
+            return None
+
+        SiteMiddleware(get_response)(rf.get("/", HTTP_HOST=site.domain))
+
+        assert seen == {"current": site, "get_current": site}
+        assert get_current_site() is None
+        assert settings.SITE_ID == 1
+
+    def test_cached_site_does_not_query(
+        self, middleware, site, rf: RequestFactory, django_assert_num_queries
+    ):
+        middleware.process_request(rf.get("/", HTTP_HOST=site.domain))
+
+        request = rf.get("/", HTTP_HOST=site.domain)
+        with django_assert_num_queries(0):
+            middleware.process_request(request)
+        assert request.site == site
+
+    def test_saving_site_invalidates_cache(self, middleware, site, rf):
+        middleware.process_request(rf.get("/", HTTP_HOST=site.domain))
+
+        site.name = "Renamed Site"
+        site.save()
+
+        request = rf.get("/", HTTP_HOST=site.domain)
+        middleware.process_request(request)
+        assert request.site.name == "Renamed Site"
+
+    def test_creating_site_invalidates_negative_entry(self):
+        assert site_routes.resolve("new.localhost") is None
+
+        site = Site.objects.create(domain="new.localhost", name="New Site")
+        assert site_routes.resolve("new.localhost") == site
+
+    def test_deleting_site_invalidates_cache(self, site):
+        assert site_routes.resolve(site.domain) == site
+
+        site.delete()
+        assert site_routes.resolve(site.domain) is None
+
+    def test_changing_domain_removes_old_route(self, site):
+        old_domain = site.domain
+        assert site_routes.resolve(old_domain) == site
+
+        site.domain = "renamed.localhost"
+        site.save()
+        assert site_routes.resolve(old_domain) is None
+        assert site_routes.resolve("renamed.localhost") == site
+
+    def test_site_change_is_published_on_commit(
+        self, site, mocker, django_capture_on_commit_callbacks
+    ):
+        redis = mocker.patch("redis.Redis.from_url")
+
+        with (
+            override_settings(SITE_CACHE_INVALIDATION_CHANNEL="site-cache"),
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            site.save()
+
+        redis.return_value.publish.assert_called_once_with(
+            "site-cache", f"save:{site.pk}"
+        )
+
+
+@pytest.mark.django_db
+class TestCurrentSite:
+    def test_get_current_falls_back_to_site_id(self):
+        assert Site.objects.get_current().pk == settings.SITE_ID
+
+    def test_get_current_reads_request_site(self, site, rf: RequestFactory):
+        request = rf.get("/")
+        request.site = site
+        assert Site.objects.get_current(request) == site
+
+    def test_current_site_is_isolated_between_threads(self, site, other_site):
+        def current_site_name(site: Site) -> str:
+            with use_site(site):
+                return Site.objects.get_current().name
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            names = list(executor.map(current_site_name, [site, other_site] * 10))
+
+        assert names == [site.name, other_site.name] * 10
+        assert get_current_site() is None
+
+
+@pytest.mark.django_db
+class TestSiteRoutingTable:
+    def test_host_is_case_insensitive(self, site):
+        assert site_routes.resolve(site.domain.upper()) == site
+
+    def test_wildcard_subdomain(self):
+        site = Site.objects.create(domain="*.tenants.example.com", name="Tenants")
+
+        assert site_routes.resolve("acme.tenants.example.com") == site
+        assert site_routes.resolve("acme.tenants.example.com:8000") == site
+        assert site_routes.resolve("tenants.example.com") is None
+        assert site_routes.resolve("a.b.tenants.example.com") is None
+
+    def test_exact_domain_wins_over_wildcard(self):
+        Site.objects.create(domain="*.example.com", name="Wildcard")
+        site = Site.objects.create(domain="acme.example.com", name="Acme")
+
+        assert site_routes.resolve("acme.example.com") == site
+
+    @override_settings(SITE_ALIASES={"www.testsite.localhost": "testsite.localhost"})
+    def test_alias(self, site):
+        assert site_routes.resolve("www.testsite.localhost") == site
+
+    def test_many_sites_resolve_without_queries(self, django_assert_num_queries):
+        Site.objects.bulk_create(
+            Site(domain=f"tenant-{i}.example.com", name=f"Tenant {i}")
+            for i in range(500)
+        )
+        site_routes.load()
+
+        with django_assert_num_queries(0):
+            site = site_routes.resolve("tenant-321.example.com:443")
+        assert site is not None and site.name == "Tenant 321"
+
+    def test_apply_invalidation_from_other_process(self, site):
+        site_routes.load()
+        # Simulate a change made by another process, without signals.
+        Site.objects.filter(pk=site.pk).update(domain="moved.localhost")
+
+        apply_invalidation(f"save:{site.pk}")
+        assert site_routes.resolve("moved.localhost") == site
+        assert site_routes.resolve("testsite.localhost") is None
+
+        apply_invalidation(f"delete:{site.pk}")
+        assert site_routes.resolve("moved.localhost") is None
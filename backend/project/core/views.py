@@ -1,8 +1,11 @@
+from inspect import isawaitable
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from drf_spectacular.utils import OpenApiResponse  # type: ignore
 from drf_spectacular.utils import extend_schema  # type: ignore
-from rest_framework import status
+from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from revproxy.views import ProxyView
@@ -10,11 +13,68 @@ from revproxy.views import ProxyView
 from .permissions import PublicReadOnly
 
 
-class HealthCheck(APIView):
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers (`async def get`, ...) run on the event loop.
+
+    DRF's dispatch is sync-only. This runs the same steps, but awaits the
+    handler. Authentication may query the database, so `initial()` (auth,
+    permissions, throttling) runs in a thread unless the view has no
+    authentication classes.
+
+    Under WSGI, Django runs these views through `async_to_sync`, so they keep
+    working there too.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # DRF wraps the view in csrf_exempt, make sure it's still seen as async.
+        if cls.view_is_async:
+            markcoroutinefunction(view)
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            if self.authentication_classes:
+                await sync_to_async(self.initial)(request, *args, **kwargs)
+            else:
+                self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncGenericAPIView(AsyncAPIView, generics.GenericAPIView):
+    pass
+
+
+class HealthCheck(AsyncAPIView):
     """
     Healthcheck endpoint.
     """
 
+    authentication_classes = []
     permission_classes = [PublicReadOnly]
 
     @extend_schema(
@@ -22,11 +82,11 @@ class HealthCheck(APIView):
         responses={204: None},
         tags=["Checks"],
     )
-    def get(self, _):
+    async def get(self, _):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class AuthCheck(APIView):
+class AuthCheck(AsyncAPIView):
     """
     A private Healthcheck endpoint used for testing API key permissions.
     """
@@ -39,7 +99,7 @@ class AuthCheck(APIView):
         },
         tags=["Checks"],
     )
-    def get(self, _):
+    async def get(self, _):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
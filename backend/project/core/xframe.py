@@ -1,10 +1,12 @@
 from urllib.parse import urlparse
 
+from asgiref.sync import iscoroutinefunction
 from django.conf import settings
-from django.utils.deprecation import MiddlewareMixin
 
+from project.core.middleware import SyncAndAsyncMiddleware
 
-class XFrameAllowFrontendDomainsMiddleware(MiddlewareMixin):
+
+class XFrameAllowFrontendDomainsMiddleware(SyncAndAsyncMiddleware):
     """
     The frontend is allowed to embed the admin site in an iframe.
 
@@ -12,6 +14,14 @@ class XFrameAllowFrontendDomainsMiddleware(MiddlewareMixin):
     which domains can embed this content in iframes, replacing the deprecated X-Frame-Options.
     """
 
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
     def process_response(self, request, response):
         referrer = request.headers.get("referer")
         if referrer:
@@ -115,8 +115,22 @@ CSP_STYLE_SRC = [
 
 # Application definition.
 
+# Fallback site when there's no request; SiteMiddleware sets the current site
+# per request (see project.core.sites).
 SITE_ID = 1
 
+# Per-process tenant routing table, see project.core.sites.
+SITE_CACHE_TTL = int(os.environ.get("SITE_CACHE_TTL", 300))
+SITE_CACHE_INVALIDATION_CHANNEL = os.environ.get(
+    "SITE_CACHE_INVALIDATION_CHANNEL", "site-cache-invalidation"
+)
+# Extra hosts for existing sites, e.g. "www.example.com=example.com".
+SITE_ALIASES = dict(
+    alias.strip().split("=", 1)
+    for alias in os.environ.get("SITE_ALIASES", "").split(",")
+    if alias.strip()
+)
+
 APPEND_SLASH = True
 
 AUTH_USER_MODEL = "accounts.User"